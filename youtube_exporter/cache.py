@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import shelve
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+LOG = logging.getLogger("youtube_exporter")
+
+CACHE_DIR = Path.home() / ".cache" / "youtube_exporter"
+
+
+class DiskCache:
+    """
+    Persistent key/value store with per-entry expiry, backed by shelve.
+    Safe to share between threads. Storage errors disable the cache for
+    the rest of the process instead of failing the export.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, bypass_env: Optional[str] = None):
+        self._path = CACHE_DIR / name
+        self._ttl = ttl_seconds
+        self._bypass_env = bypass_env
+        self._lock = threading.Lock()
+        self._db: Optional[shelve.Shelf] = None
+        self._disabled = False
+
+    def _open(self) -> Optional[shelve.Shelf]:
+        # Called with the lock held. Opened lazily so importing is free.
+        if self._db is None and not self._disabled:
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = shelve.open(str(self._path))
+                atexit.register(self.close)
+            except Exception as e:
+                LOG.debug("Disk cache %s disabled: %s", self._path, e)
+                self._disabled = True
+        return self._db
+
+    def get(self, key: str) -> Any:
+        if self._bypass_env and os.environ.get(self._bypass_env) == "1":
+            return None
+
+        with self._lock:
+            db = self._open()
+            if db is None:
+                return None
+            try:
+                entry = db.get(key)
+            except Exception:
+                return None
+
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            db = self._open()
+            if db is None:
+                return
+            try:
+                db[key] = (time.time() + self._ttl, value)
+            except Exception as e:
+                LOG.debug("Disk cache write failed for %s: %s", key, e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
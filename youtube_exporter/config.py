@@ -10,6 +10,10 @@ DEFAULT_MAX_VIDEOS = 25
 DEFAULT_SHEET_NAME = "Example"
 DEFAULT_TOKEN_PATH = "token.json"
 
+TRANSCRIPT_WORKERS = 10
+VIDEO_DETAILS_WORKERS = 8
+HTTP_TIMEOUT_SECONDS = 30
+
 
 @dataclass(frozen=True)
 class ExportConfig:
@@ -1,102 +1,244 @@
 from __future__ import annotations
 
+import contextlib
 import csv
 import logging
-from typing import Any, Dict, List
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
-from .config import ExportConfig
+from google.oauth2.credentials import Credentials
+
+from .config import ExportConfig, TRANSCRIPT_WORKERS
 from .errors import FriendlyError
 from .youtube_api import (
     build_youtube_api,
-    build_youtube_oauth,
+    build_youtube_oauth_client,
+    load_youtube_oauth_credentials,
+    refresh_if_needed_within,
     parse_channel_identifier,
-    resolve_channel_id,
-    get_uploads_playlist_id,
-    list_upload_video_ids,
+    resolve_channel_and_uploads,
+    iter_upload_video_ids,
     get_video_details,
     get_transcript_official,
 )
-from .sheets_writer import build_sheets_service, append_to_sheet, read_existing_video_urls
 
 
 LOG = logging.getLogger("youtube_exporter")
 
+# Called with (done, total) as rows are finalised.
+ProgressCallback = Callable[[int, int], None]
 
-def rows_to_csv(rows: List[Dict[str, Any]], out_path: str) -> None:
-    headers = ["video_url", "title", "thumbnail_url",
+CSV_HEADERS = ["video_url", "title", "thumbnail_url",
                "view_count", "posted_date", "transcript"]
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=headers)
-        w.writeheader()
-        for r in rows:
-            w.writerow({k: r.get(k, "") for k in headers})
 
 
-def run_export(cfg: ExportConfig) -> List[Dict[str, Any]]:
-    LOG.info("Starting export")
-    LOG.info("Channel input: %s", cfg.channel_input)
-    LOG.info("Max videos: %s", cfg.max_videos)
+@contextlib.contextmanager
+def _replace_on_success(path: str) -> Iterator[Any]:
+    """
+    Open a temp file next to path for CSV writing. It replaces path only
+    when the block completes, so a failed export leaves the old file intact.
+    """
+    # Write through symlinks instead of replacing the link itself.
+    target = os.path.realpath(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            yield f
+        # mkstemp creates the file as 0600; give it the permissions a
+        # plain open() would, or those of the file being replaced.
+        if os.path.exists(target):
+            shutil.copymode(target, tmp_path)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def iter_transcripts(creds: Credentials, video_ids: List[str]) -> Iterator[str]:
+    """
+    Fetch transcripts concurrently. Results are yielded in input order
+    as soon as they are available.
+    """
+    # API clients wrap an httplib2.Http which is not thread safe,
+    # so every worker builds and keeps its own client.
+    local = threading.local()
+
+    def fetch(video_id: str) -> str:
+        # Long exports can outlive the token; only one worker refreshes it.
+        refresh_if_needed_within(creds)
+        client = getattr(local, "youtube_oauth", None)
+        if client is None:
+            client = local.youtube_oauth = build_youtube_oauth_client(creds)
+        return get_transcript_official(client, video_id)
+
+    with ThreadPoolExecutor(max_workers=TRANSCRIPT_WORKERS) as ex:
+        yield from ex.map(fetch, video_ids)
+
+
+def _iter_final_rows(
+    rows: List[Dict[str, Any]],
+    oauth_creds: Optional[Credentials],
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Attach transcripts and yield (video_id, row) pairs. The video_id key
+    is removed from the row itself.
+    """
+    if oauth_creds is None:
+        for r in rows:
+            video_id = r.pop("video_id", "")
+            r["transcript"] = ""
+            yield video_id, r
+        return
+
+    transcripts = iter_transcripts(
+        oauth_creds, [r.get("video_id", "") for r in rows])
+    for r, transcript in zip(rows, transcripts):
+        video_id = r.pop("video_id", "")
+        r["transcript"] = transcript
+        yield video_id, r
+
+
+def prepare_sheet(cfg: ExportConfig) -> Tuple[Any, FrozenSet[str]]:
+    """
+    Build the Sheets client, verify the worksheet and read the video ids
+    already in the sheet when skip_existing is enabled.
+    """
+    # Sheets support is imported only for exports that write to a sheet.
+    from .sheets_writer import (
+        build_sheets_service,
+        ensure_sheet_exists,
+        read_existing_video_urls,
+        video_id_from_url,
+    )
+
+    sheets_service = build_sheets_service(cfg.sheets_service_account_json)
+    ensure_sheet_exists(sheets_service, cfg.spreadsheet_id,
+                        cfg.worksheet_name, cfg.sheets_service_account_json)
+
+    existing_ids: FrozenSet[str] = frozenset()
+    if cfg.skip_existing:
+        existing_urls = read_existing_video_urls(
+            sheets_service, cfg.spreadsheet_id, cfg.worksheet_name)
+        LOG.info("Skip existing enabled. Existing URLs found: %s",
+                 len(existing_urls))
+        # Compare by video id so URL variants (youtu.be, extra params) match.
+        existing_ids = frozenset(filter(None, map(video_id_from_url, existing_urls)))
+    return sheets_service, existing_ids
+
 
+def _fetch_base_rows(cfg: ExportConfig) -> Tuple[List[Dict[str, Any]], Optional[Credentials]]:
     youtube = build_youtube_api(cfg.api_key)
 
-    youtube_oauth = None
+    oauth_creds = None
     if cfg.oauth_client_secrets:
         LOG.info("OAuth enabled for transcripts")
-        youtube_oauth = build_youtube_oauth(
+        oauth_creds = load_youtube_oauth_credentials(
             cfg.oauth_client_secrets, token_path=cfg.token_path)
     else:
         LOG.info(
             "OAuth not enabled. Transcript field will remain empty unless you provide OAuth client secrets.")
 
     ident = parse_channel_identifier(cfg.channel_input)
-    channel_id = resolve_channel_id(youtube, ident)
+    channel_id, uploads = resolve_channel_and_uploads(youtube, ident)
     LOG.info("Resolved channel id: %s", channel_id)
-
-    uploads = get_uploads_playlist_id(youtube, channel_id)
     LOG.info("Uploads playlist id: %s", uploads)
 
-    video_ids = list_upload_video_ids(youtube, uploads, cfg.max_videos)
-    LOG.info("Fetched video ids: %s", len(video_ids))
-
+    # Playlist pages are consumed lazily, so detail batches start while
+    # the remaining pages are still being listed.
+    video_ids = iter_upload_video_ids(youtube, uploads, cfg.max_videos)
     base_rows = get_video_details(youtube, video_ids)
     LOG.info("Fetched video details: %s", len(base_rows))
 
-    existing_urls = set()
-    sheets_service = None
-    if cfg.skip_existing and cfg.sheets_service_account_json and cfg.spreadsheet_id and cfg.worksheet_name:
-        sheets_service = build_sheets_service(cfg.sheets_service_account_json)
-        existing_urls = read_existing_video_urls(
-            sheets_service, cfg.spreadsheet_id, cfg.worksheet_name)
-        LOG.info("Skip existing enabled. Existing URLs found: %s",
-                 len(existing_urls))
+    return base_rows, oauth_creds
 
-    final_rows: List[Dict[str, Any]] = []
-    for r in base_rows:
-        if cfg.skip_existing and existing_urls and r.get("video_url") in existing_urls:
-            continue
 
-        video_id = r.get("video_id", "")
-        r["transcript"] = get_transcript_official(
-            youtube_oauth, video_id) if youtube_oauth else ""
-        r.pop("video_id", None)
-        final_rows.append(r)
+def run_export(
+    cfg: ExportConfig,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Dict[str, Any]]:
+    LOG.info("Starting export")
+    LOG.info("Channel input: %s", cfg.channel_input)
+    LOG.info("Max videos: %s", cfg.max_videos)
+
+    use_sheets = bool(
+        cfg.sheets_service_account_json and cfg.spreadsheet_id and cfg.worksheet_name)
+
+    # Sheet checks run on a single background thread (the Sheets client is
+    # not thread safe) while the YouTube metadata is fetched.
+    with ThreadPoolExecutor(max_workers=1) as sheet_ex:
+        sheet_future = sheet_ex.submit(prepare_sheet, cfg) if use_sheets else None
+        base_rows, oauth_creds = _fetch_base_rows(cfg)
+
+        existing_ids: FrozenSet[str] = frozenset()
+        sheets_service = None
+        sheet_error: Optional[Exception] = None
+        if sheet_future is not None:
+            try:
+                sheets_service, existing_ids = sheet_future.result()
+            except Exception as e:
+                # Without a CSV there is nothing to save, so fail before any
+                # transcript quota is spent. Otherwise write the CSV first.
+                if not cfg.out_csv:
+                    raise
+                sheet_error = e
+
+    final_rows = base_rows
+    if cfg.skip_existing and existing_ids:
+        final_rows = [r for r in base_rows if r.get("video_id", "") not in existing_ids]
 
     LOG.info("Rows after filtering: %s", len(final_rows))
 
+    # Single pass: each finished row is written to the CSV and converted
+    # to Sheets cells right away, instead of iterating the rows per output.
+    sheet_values: List[List[Any]] = []
+    row_to_cells = None
+    if sheets_service is not None:
+        from .sheets_writer import SHEET_HEADERS, sheet_row_cells
+
+        sheet_values.append(SHEET_HEADERS)
+        row_to_cells = sheet_row_cells
+
+    with contextlib.ExitStack() as stack:
+        csv_writer = None
+        if cfg.out_csv:
+            f = stack.enter_context(_replace_on_success(cfg.out_csv))
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(CSV_HEADERS)
+
+        total = len(final_rows)
+        rows = _iter_final_rows(final_rows, oauth_creds)
+        for done, (video_id, r) in enumerate(rows, 1):
+            if csv_writer is not None:
+                csv_writer.writerow([r.get(k, "") for k in CSV_HEADERS])
+            if row_to_cells is not None:
+                sheet_values.append(row_to_cells(r, video_id))
+            if progress is not None:
+                progress(done, total)
+
     if cfg.out_csv:
-        rows_to_csv(final_rows, cfg.out_csv)
         LOG.info("CSV written: %s", cfg.out_csv)
 
-    if cfg.sheets_service_account_json and cfg.spreadsheet_id and cfg.worksheet_name:
-        if sheets_service is None:
-            sheets_service = build_sheets_service(
-                cfg.sheets_service_account_json)
+    if sheet_error is not None:
+        raise sheet_error
+
+    if sheets_service is not None:
+        from .sheets_writer import append_values_to_sheet
 
-        append_to_sheet(
+        append_values_to_sheet(
             sheets_service,
             cfg.spreadsheet_id,
             cfg.worksheet_name,
-            final_rows,
+            sheet_values,
             service_account_json=cfg.sheets_service_account_json
         )
         LOG.info("Google Sheets updated: %s", cfg.spreadsheet_id)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+from googleapiclient.model import JsonModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Any) -> Any:
+    """
+    Parse JSON from bytes or str. Uses orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJsonModel(JsonModel):
+    def deserialize(self, content):
+        try:
+            body = loads(content)
+        except ValueError:
+            return super().deserialize(content)
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
+
+def api_model() -> Optional[JsonModel]:
+    """
+    Response model for discovery clients. None keeps the library default.
+    """
+    return FastJsonModel() if orjson is not None else None
@@ -6,7 +6,6 @@ import sys
 from .config import ExportConfig, DEFAULT_MAX_VIDEOS, DEFAULT_SHEET_NAME
 from .exporter import run_export
 from .logutil import setup_logging
-from .ui_tk import App
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -43,6 +42,9 @@ def main() -> None:
     setup_logging(args.verbose)
 
     if args.gui or (len(sys.argv) == 1):
+        # Imported here so CLI runs do not pay for loading tkinter.
+        from .ui_tk import App
+
         app = App()
         app.mainloop()
         return
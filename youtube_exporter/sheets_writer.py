@@ -1,26 +1,46 @@
 from __future__ import annotations
 
-import json
+import functools
 import logging
 import re
-from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
 
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 
-from .config import SHEETS_SCOPES
+from .config import HTTP_TIMEOUT_SECONDS, SHEETS_SCOPES
 from .errors import PermissionDeniedError, SheetNotFoundError
+from .jsonutil import api_model, loads
 
 
 LOG = logging.getLogger("youtube_exporter")
 
+SHEET_HEADERS = [
+    "YouTube Video Link",
+    "Thumbnail",
+    "Title",
+    "Posted Date",
+    "Views Count",
+    "Transcript",
+]
 
+# Larger writes are split into several append requests of this many rows.
+APPEND_BATCH_ROWS = 10_000
+
+# watch?v=VIDEOID, youtu.be/VIDEOID and /shorts/VIDEOID
+_RE_VIDEO_URL = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/)([A-Za-z0-9_-]{6,})", re.ASCII)
+_RE_SPLIT = re.compile(r"[/?#&]+", re.ASCII)
+_RE_ID_TAIL = re.compile(r"[A-Za-z0-9_-]{6,}", re.ASCII)
+
+
+@functools.lru_cache(maxsize=4)
 def try_read_service_account_email(service_account_json_path: str) -> str:
     try:
-        data = json.loads(
-            Path(service_account_json_path).read_text(encoding="utf-8"))
+        with open(service_account_json_path, "rb") as f:
+            data = loads(f.read())
         return str(data.get("client_email") or "")
     except Exception:
         return ""
@@ -33,26 +53,15 @@ def video_id_from_url(url: str) -> str:
     """
     s = (url or "").strip()
 
-    # https://www.youtube.com/watch?v=VIDEOID
-    m = re.search(r"[?&]v=([A-Za-z0-9_-]{6,})", s)
-    if m:
-        return m.group(1)
-
-    # https://youtu.be/VIDEOID
-    m = re.search(r"youtu\.be/([A-Za-z0-9_-]{6,})", s)
-    if m:
-        return m.group(1)
-
-    # https://www.youtube.com/shorts/VIDEOID
-    m = re.search(r"/shorts/([A-Za-z0-9_-]{6,})", s)
+    m = _RE_VIDEO_URL.search(s)
     if m:
         return m.group(1)
 
     # Fallback: last path segment if it looks like an id
-    parts = [p for p in re.split(r"[/?#&]+", s) if p]
+    parts = [p for p in _RE_SPLIT.split(s) if p]
     if parts:
         tail = parts[-1]
-        if re.fullmatch(r"[A-Za-z0-9_-]{6,}", tail):
+        if _RE_ID_TAIL.fullmatch(tail):
             return tail
 
     return ""
@@ -68,17 +77,46 @@ def build_static_thumbnail_url(video_id: str) -> str:
     return f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg"
 
 
+def sheet_row_cells(r: Dict[str, Any], video_id: Optional[str] = None) -> List[Any]:
+    """
+    Convert a row to sheet cells. Pass video_id when it is already known
+    to skip parsing it back out of the video URL.
+    """
+    video_url = r.get("video_url", "") or ""
+    vid = video_id_from_url(str(video_url)) if video_id is None else video_id
+
+    # Prefer stable thumbnail URL so Sheets shows the correct image per row.
+    thumb_url = build_static_thumbnail_url(
+        vid) or str(r.get("thumbnail_url", "") or "")
+
+    return [
+        video_url,
+        '=IMAGE("' + thumb_url + '")' if thumb_url else "",
+        r.get("title", ""),
+        r.get("posted_date", ""),
+        r.get("view_count", ""),
+        r.get("transcript", ""),
+    ]
+
+
+@functools.lru_cache(maxsize=4)
 def build_sheets_service(service_account_json_path: str):
     creds = service_account.Credentials.from_service_account_file(
         service_account_json_path,
         scopes=SHEETS_SCOPES,
     )
-    return build("sheets", "v4", credentials=creds)
+    # httplib2 sends Accept-Encoding: gzip, deflate and inflates responses,
+    # which keeps large column reads small on the wire.
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+    return build("sheets", "v4", http=http, model=api_model(),
+                 cache_discovery=False)
 
 
 def list_sheet_titles(sheets_service, spreadsheet_id: str) -> List[str]:
     meta = sheets_service.spreadsheets().get(
-        spreadsheetId=spreadsheet_id).execute()
+        spreadsheetId=spreadsheet_id,
+        fields="sheets.properties.title",
+    ).execute()
     sheets = meta.get("sheets", [])
     titles: List[str] = []
     for s in sheets:
@@ -99,15 +137,12 @@ def read_existing_video_urls(
         resp = sheets_service.spreadsheets().values().get(
             spreadsheetId=spreadsheet_id,
             range=rng,
+            majorDimension="ROWS",
+            fields="values",
         ).execute()
         values = resp.get("values", [])
-        urls: Set[str] = set()
-        for row in values:
-            if row and isinstance(row, list):
-                v = str(row[0]).strip()
-                if v.startswith("http"):
-                    urls.add(v)
-        return urls
+        # Formatted values are always returned as strings.
+        return {v for v in (row[0].strip() for row in values if row) if v.startswith("http")}
     except HttpError:
         return set()
 
@@ -139,50 +174,37 @@ def append_to_sheet(
     rows: List[Dict[str, Any]],
     service_account_json: Optional[str] = None,
 ) -> None:
-    headers = [
-        "YouTube Video Link",
-        "Thumbnail",
-        "Title",
-        "Posted Date",
-        "Views Count",
-        "Transcript",
-    ]
-
-    values: List[List[Any]] = [headers]
-
-    for r in rows:
-        video_url = str(r.get("video_url", "") or "")
-        vid = video_id_from_url(video_url)
-
-        # Prefer stable thumbnail URL so Sheets shows the correct image per row.
-        thumb_url = build_static_thumbnail_url(
-            vid) or str(r.get("thumbnail_url", "") or "")
-        thumbnail_formula = f'=IMAGE("{thumb_url}")' if thumb_url else ""
+    values: List[List[Any]] = [SHEET_HEADERS] + [sheet_row_cells(r) for r in rows]
+    append_values_to_sheet(sheets_service, spreadsheet_id,
+                           sheet_name, values, service_account_json)
 
-        values.append(
-            [
-                r.get("video_url", ""),
-                thumbnail_formula,
-                r.get("title", ""),
-                r.get("posted_date", ""),
-                r.get("view_count", ""),
-                r.get("transcript", ""),
-            ]
-        )
-
-    ensure_sheet_exists(sheets_service, spreadsheet_id,
-                        sheet_name, service_account_json)
 
+def append_values_to_sheet(
+    sheets_service,
+    spreadsheet_id: str,
+    sheet_name: str,
+    values: List[List[Any]],
+    service_account_json: Optional[str] = None,
+) -> None:
+    """
+    Append a prebuilt values matrix, header row included.
+    """
     target_range = f"{sheet_name}!A1"
     try:
-        sheets_service.spreadsheets().values().append(
-            spreadsheetId=spreadsheet_id,
-            range=target_range,
-            valueInputOption="USER_ENTERED",
-            insertDataOption="INSERT_ROWS",
-            body={"values": values},
-        ).execute()
+        for start in range(0, len(values), APPEND_BATCH_ROWS):
+            sheets_service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=target_range,
+                valueInputOption="USER_ENTERED",
+                insertDataOption="INSERT_ROWS",
+                body={"values": values[start:start + APPEND_BATCH_ROWS]},
+            ).execute()
     except HttpError as e:
+        # The append is issued optimistically. Only on failure is the
+        # spreadsheet metadata checked, so a missing worksheet or missing
+        # access is reported with a specific error.
+        ensure_sheet_exists(sheets_service, spreadsheet_id,
+                            sheet_name, service_account_json)
         client_email = try_read_service_account_email(
             service_account_json) if service_account_json else ""
         hint = f" Share the Google Sheet with this service account as Editor: {client_email}" if client_email else ""
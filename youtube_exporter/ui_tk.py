@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
@@ -30,6 +32,9 @@ class App(tk.Tk):
 
         self.var_skip_existing = tk.BooleanVar(value=False)
 
+        self.var_status = tk.StringVar()
+        self._events: queue.Queue = queue.Queue()
+
         self._build_ui()
 
     def _build_ui(self):
@@ -115,10 +120,12 @@ class App(tk.Tk):
 
         btns = ttk.Frame(frm)
         btns.grid(row=15, column=0, columnspan=2, sticky="we", pady=8)
-        ttk.Button(btns, text="Run export", command=self._run).pack(
-            side="left", padx=6)
+        self.btn_run = ttk.Button(btns, text="Run export", command=self._run)
+        self.btn_run.pack(side="left", padx=6)
         ttk.Button(btns, text="Quit", command=self.destroy).pack(
             side="left", padx=6)
+        ttk.Label(btns, textvariable=self.var_status).pack(
+            side="left", padx=6)
 
         frm.columnconfigure(1, weight=1)
 
@@ -187,10 +194,45 @@ class App(tk.Tk):
             skip_existing=self.var_skip_existing.get(),
         )
 
+        # The export runs on a worker thread so the window stays responsive.
+        # Tk is not thread safe: the worker only puts events on a queue
+        # which the main loop drains.
+        self.btn_run.state(["disabled"])
+        self.var_status.set("Running export...")
+        threading.Thread(target=self._do_export,
+                         args=(cfg,), daemon=True).start()
+        self.after(50, self._poll_events)
+
+    def _do_export(self, cfg: ExportConfig):
+        def progress(done: int, total: int):
+            self._events.put(("progress", done, total))
+
         try:
-            rows = run_export(cfg)
-            messagebox.showinfo("Done", f"Exported {len(rows)} videos")
+            rows = run_export(cfg, progress=progress)
+            self._events.put(("done", len(rows)))
         except FriendlyError as e:
-            messagebox.showerror("Error", str(e))
+            self._events.put(("error", str(e)))
         except Exception as e:
-            messagebox.showerror("Error", str(e))
+            self._events.put(("error", str(e)))
+
+    def _poll_events(self):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = event[0]
+            if kind == "progress":
+                self.var_status.set(f"Exported {event[1]} of {event[2]} videos")
+                continue
+
+            self.btn_run.state(["!disabled"])
+            self.var_status.set("")
+            if kind == "done":
+                messagebox.showinfo("Done", f"Exported {event[1]} videos")
+            else:
+                messagebox.showerror("Error", event[1])
+            return
+
+        self.after(50, self._poll_events)
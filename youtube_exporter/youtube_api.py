@@ -1,30 +1,71 @@
 from __future__ import annotations
 
-import json
+import functools
 import logging
 import os
 import re
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import httplib2
 from dateutil import parser as date_parser
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
-from .config import YOUTUBE_SCOPES_CAPTIONS
+from .cache import DiskCache
+from .config import HTTP_TIMEOUT_SECONDS, VIDEO_DETAILS_WORKERS, YOUTUBE_SCOPES_CAPTIONS
 from .errors import FriendlyError, QuotaExceededError
+from .jsonutil import api_model, loads
 
 
 LOG = logging.getLogger("youtube_exporter")
 
+# Partial-response masks: only the parts of each resource this module reads.
+VIDEOS_FIELDS_MASK = "items(id,snippet(title,publishedAt,thumbnails),statistics/viewCount)"
+PLAYLIST_FIELDS_MASK = "items/contentDetails/videoId,nextPageToken"
+CHANNELS_FIELDS_MASK = "items(id,contentDetails/relatedPlaylists/uploads)"
+SEARCH_FIELDS_MASK = "items/snippet/channelId"
+CAPTIONS_FIELDS_MASK = "items(id,snippet/language)"
+
+# Shared default for .get() on nested resources. Read-only: never mutate.
+_EMPTY_DICT: Dict[str, Any] = {}
+
+_THREAD_LOCAL = threading.local()
+_REFRESH_LOCK = threading.Lock()
+
+# Channel lookups are stable, so repeated exports in one process (GUI
+# re-runs, scripted loops) resolve each channel only once.
+_CHANNEL_ID_CACHE: Dict[Tuple[Tuple[str, str], ...], str] = {}
+_UPLOADS_PLAYLIST_CACHE: Dict[str, str] = {}
+
+# Downloaded transcripts, kept for 30 days. Set YT_CAPTION_CACHE_BUST=1
+# to ignore cached entries and fetch everything again.
+_CAPTION_CACHE = DiskCache(
+    "captions", ttl_seconds=30 * 24 * 3600, bypass_env="YT_CAPTION_CACHE_BUST")
+
+_RE_CHANNEL_ID = re.compile(r"^UC[a-zA-Z0-9_-]{20,}$", re.ASCII)
+# Group names are the identifier keys returned by parse_channel_identifier.
+_RE_CHANNEL_URL = re.compile(
+    r"(?:youtube\.com|youtu\.be)/(?:"
+    r"(?P<forHandle>@[A-Za-z0-9_.-]+)"
+    r"|channel/(?P<id>UC[a-zA-Z0-9_-]{20,})"
+    r"|user/(?P<forUsername>[A-Za-z0-9_.-]+)"
+    r"|c/(?P<customUrl>[A-Za-z0-9_.-]+))",
+    re.ASCII,
+)
+
 
 def _http_error_reason(err: HttpError) -> str:
     try:
-        data = json.loads(err.content.decode("utf-8", errors="ignore"))
+        data = loads(err.content)
         errors = data.get("error", {}).get("errors", [])
         if errors and isinstance(errors, list):
             return str(errors[0].get("reason") or "")
@@ -33,6 +74,23 @@ def _http_error_reason(err: HttpError) -> str:
     return ""
 
 
+def _thread_http(shared_http):
+    """
+    Per-thread replacement for a client's http object. httplib2.Http is
+    not thread safe, so pool workers keep their own connection and only
+    share the credentials.
+    """
+    http = getattr(_THREAD_LOCAL, "http", None)
+    if http is None:
+        http = _THREAD_LOCAL.http = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+
+    # Plain httplib2.Http objects also have a .credentials attribute
+    # (httplib2's own basic-auth store), so check the wrapper type.
+    if isinstance(shared_http, AuthorizedHttp):
+        return AuthorizedHttp(shared_http.credentials, http=http)
+    return http
+
+
 def _raise_friendly_http_error(err: HttpError, context: str) -> None:
     reason = _http_error_reason(err)
     status = getattr(err.resp, "status", None)
@@ -52,45 +110,43 @@ def parse_channel_identifier(channel_input: str) -> Dict[str, str]:
     if s.startswith("@"):
         return {"forHandle": s}
 
-    if re.match(r"^UC[a-zA-Z0-9_-]{20,}$", s):
+    # Prefix check first so most inputs never reach the regex engine.
+    if len(s) >= 22 and s[0] == "U" and s[1] == "C" and _RE_CHANNEL_ID.match(s):
         return {"id": s}
 
-    m = re.search(r"(?:youtube\.com|youtu\.be)/(@[A-Za-z0-9_.-]+)", s)
-    if m:
-        return {"forHandle": m.group(1)}
-
-    m = re.search(r"youtube\.com/channel/(UC[a-zA-Z0-9_-]{20,})", s)
+    m = _RE_CHANNEL_URL.search(s)
     if m:
-        return {"id": m.group(1)}
-
-    m = re.search(r"youtube\.com/user/([A-Za-z0-9_.-]+)", s)
-    if m:
-        return {"forUsername": m.group(1)}
-
-    m = re.search(r"youtube\.com/c/([A-Za-z0-9_.-]+)", s)
-    if m:
-        return {"customUrl": m.group(1)}
+        return {m.lastgroup: m.group(m.lastgroup)}
 
     return {"forUsername": s}
 
 
+@functools.lru_cache(maxsize=4)
 def build_youtube_api(api_key: str):
-    return build("youtube", "v3", developerKey=api_key)
+    """
+    Build the API key client on one keep-alive connection, reused for
+    every metadata request made through it.
+    """
+    http = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+    return build("youtube", "v3", developerKey=api_key, http=http, model=api_model(),
+                 cache_discovery=False)
 
 
-def build_youtube_oauth(client_secrets_path: str, token_path: str = "token.json"):
+def load_youtube_oauth_credentials(client_secrets_path: str, token_path: str = "token.json") -> Credentials:
     creds = None
     token_file = Path(token_path)
 
-    if token_file.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(
-                str(token_file), YOUTUBE_SCOPES_CAPTIONS)
-        except Exception:
-            creds = None
+    # A missing, unreadable or malformed token all lead to a fresh login.
+    try:
+        creds = Credentials.from_authorized_user_info(
+            loads(token_file.read_bytes()), YOUTUBE_SCOPES_CAPTIONS)
+    except Exception:
+        creds = None
 
-    if creds and creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+    # Refresh ahead of expiry on this thread, so transcript workers start
+    # with a token that stays valid and do not race to refresh it.
+    if creds and refresh_if_needed_within(creds):
+        token_file.write_text(creds.to_json(), encoding="utf-8")
 
     if not creds or not creds.valid:
         flow = InstalledAppFlow.from_client_secrets_file(
@@ -98,10 +154,55 @@ def build_youtube_oauth(client_secrets_path: str, token_path: str = "token.json"
         creds = flow.run_local_server(port=0)
         token_file.write_text(creds.to_json(), encoding="utf-8")
 
-    return build("youtube", "v3", credentials=creds)
+    return creds
+
+
+def _expires_within(creds: Credentials, seconds: int) -> bool:
+    if creds.expiry is None:
+        return not creds.token
+    # google-auth keeps expiry as a naive UTC datetime.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now < timedelta(seconds=seconds)
+
+
+def refresh_if_needed_within(creds: Credentials, seconds: int = 300) -> bool:
+    """
+    Refresh creds when they expire within the given number of seconds.
+    Refreshes are serialised, so threads sharing creds trigger only one.
+    Returns True if a refresh was made.
+    """
+    if not creds.refresh_token or not _expires_within(creds, seconds):
+        return False
+
+    with _REFRESH_LOCK:
+        if not _expires_within(creds, seconds):
+            return False
+        creds.refresh(Request())
+        return True
+
+
+def build_youtube_oauth_client(creds: Credentials):
+    """
+    Build a captions client on its own keep-alive connection.
+    The client must not be shared between threads.
+    """
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+    return build("youtube", "v3", http=http, model=api_model(),
+                 cache_discovery=False)
+
+
+def build_youtube_oauth(client_secrets_path: str, token_path: str = "token.json"):
+    creds = load_youtube_oauth_credentials(
+        client_secrets_path, token_path=token_path)
+    return build_youtube_oauth_client(creds)
 
 
 def iso_to_date(iso_str: str) -> str:
+    # The API returns RFC 3339 timestamps (2024-05-13T10:22:00Z), so the
+    # date is the first ten characters. dateutil handles anything else.
+    if len(iso_str) > 10 and iso_str[4] == "-" and iso_str[7] == "-" and iso_str[10] in "T ":
+        return iso_str[:10]
+
     try:
         dt = date_parser.parse(iso_str)
         if isinstance(dt, datetime):
@@ -111,42 +212,66 @@ def iso_to_date(iso_str: str) -> str:
         return str(iso_str)
 
 
-def chunked(lst: List[str], n: int) -> Iterable[List[str]]:
-    for i in range(0, len(lst), n):
-        yield lst[i:i + n]
+def chunked(items: Iterable[str], n: int) -> Iterator[List[str]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+
+def unique(items: Iterable[str]) -> Iterator[str]:
+    """
+    Yield items in order, dropping repeats. Works on lazy iterators.
+    """
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
 
 
 def pick_thumbnail(snippet: Dict[str, Any]) -> str:
-    thumbs = (snippet.get("thumbnails") or {})
-    for key in ["maxres", "standard", "high", "medium", "default"]:
-        if key in thumbs and "url" in thumbs[key]:
-            return thumbs[key]["url"]
+    thumbs = (snippet.get("thumbnails") or _EMPTY_DICT)
+    for key in ("maxres", "standard", "high", "medium", "default"):
+        thumb = thumbs.get(key)
+        if thumb:
+            url = thumb.get("url")
+            if url:
+                return url
     return ""
 
 
 def resolve_channel_id(youtube, ident: Dict[str, str]) -> str:
+    key = tuple(sorted(ident.items()))
+    channel_id = _CHANNEL_ID_CACHE.get(key)
+    if channel_id is None:
+        channel_id = _CHANNEL_ID_CACHE[key] = _resolve_channel_id(youtube, ident)
+    return channel_id
+
+
+def _resolve_channel_id(youtube, ident: Dict[str, str]) -> str:
     try:
         if "id" in ident:
             return ident["id"]
 
         if "forHandle" in ident:
-            resp = youtube.channels().list(
-                part="id", forHandle=ident["forHandle"]).execute()
-            items = resp.get("items", [])
+            items = _list_channel_with_uploads(
+                youtube, forHandle=ident["forHandle"])
             if not items:
                 raise FriendlyError("Channel not found for handle")
             return items[0]["id"]
 
         if "forUsername" in ident:
-            resp = youtube.channels().list(
-                part="id", forUsername=ident["forUsername"]).execute()
-            items = resp.get("items", [])
+            items = _list_channel_with_uploads(
+                youtube, forUsername=ident["forUsername"])
             if items:
                 return items[0]["id"]
 
             q = ident["forUsername"]
-            sresp = youtube.search().list(part="snippet", q=q,
-                                          type="channel", maxResults=1).execute()
+            sresp = youtube.search().list(part="snippet", q=q, type="channel",
+                                          maxResults=1, fields=SEARCH_FIELDS_MASK).execute()
             sitems = sresp.get("items", [])
             if not sitems:
                 raise FriendlyError("Channel not found")
@@ -154,8 +279,8 @@ def resolve_channel_id(youtube, ident: Dict[str, str]) -> str:
 
         if "customUrl" in ident:
             q = ident["customUrl"]
-            sresp = youtube.search().list(part="snippet", q=q,
-                                          type="channel", maxResults=1).execute()
+            sresp = youtube.search().list(part="snippet", q=q, type="channel",
+                                          maxResults=1, fields=SEARCH_FIELDS_MASK).execute()
             sitems = sresp.get("items", [])
             if not sitems:
                 raise FriendlyError("Channel not found for custom url")
@@ -168,9 +293,16 @@ def resolve_channel_id(youtube, ident: Dict[str, str]) -> str:
 
 
 def get_uploads_playlist_id(youtube, channel_id: str) -> str:
+    uploads = _UPLOADS_PLAYLIST_CACHE.get(channel_id)
+    if uploads is None:
+        uploads = _UPLOADS_PLAYLIST_CACHE[channel_id] = _get_uploads_playlist_id(
+            youtube, channel_id)
+    return uploads
+
+
+def _get_uploads_playlist_id(youtube, channel_id: str) -> str:
     try:
-        resp = youtube.channels().list(part="contentDetails", id=channel_id).execute()
-        items = resp.get("items", [])
+        items = _list_channel_with_uploads(youtube, id=channel_id)
         if not items:
             raise FriendlyError("Channel contentDetails not found")
         return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
@@ -178,61 +310,121 @@ def get_uploads_playlist_id(youtube, channel_id: str) -> str:
         _raise_friendly_http_error(e, "fetching uploads playlist id")
 
 
-def list_upload_video_ids(youtube, uploads_playlist_id: str, max_videos: int) -> List[str]:
-    video_ids: List[str] = []
+def _list_channel_with_uploads(youtube, **lookup: str) -> List[Dict[str, Any]]:
+    """
+    channels().list returning both the channel id and its uploads playlist.
+    The playlist id is cached so resolving a channel by handle or username
+    also answers the following get_uploads_playlist_id call.
+    """
+    resp = youtube.channels().list(
+        part="id,contentDetails",
+        fields=CHANNELS_FIELDS_MASK,
+        **lookup,
+    ).execute()
+    items = resp.get("items", [])
+    for it in items:
+        uploads = it.get("contentDetails", _EMPTY_DICT).get(
+            "relatedPlaylists", _EMPTY_DICT).get("uploads")
+        if uploads:
+            _UPLOADS_PLAYLIST_CACHE[it["id"]] = uploads
+    return items
+
+
+def resolve_channel_and_uploads(youtube, ident: Dict[str, str]) -> Tuple[str, str]:
+    """
+    Resolve a channel identifier to (channel_id, uploads_playlist_id).
+    Ids, handles and usernames take a single channels().list request.
+    """
+    channel_id = resolve_channel_id(youtube, ident)
+    return channel_id, get_uploads_playlist_id(youtube, channel_id)
+
+
+def iter_upload_video_ids(
+    youtube,
+    uploads_playlist_id: str,
+    max_videos: int,
+    fields: Optional[str] = PLAYLIST_FIELDS_MASK,
+) -> Iterator[str]:
+    """
+    Yield upload video ids page by page, so callers can start working on
+    the first page while later pages are still being fetched.
+    """
+    emitted = 0
     page_token = None
 
     try:
-        while True:
-            remaining = max_videos - len(video_ids)
-            if remaining <= 0:
-                break
-
+        while emitted < max_videos:
             resp = youtube.playlistItems().list(
                 part="contentDetails",
                 playlistId=uploads_playlist_id,
-                maxResults=min(50, remaining),
-                pageToken=page_token
+                maxResults=min(50, max_videos - emitted),
+                pageToken=page_token,
+                fields=fields,
             ).execute()
 
-            for it in resp.get("items", []):
-                vid = it["contentDetails"]["videoId"]
-                video_ids.append(vid)
-                if len(video_ids) >= max_videos:
-                    return video_ids
+            page_ids = [it["contentDetails"]["videoId"]
+                        for it in resp.get("items", ())][:max_videos - emitted]
+            emitted += len(page_ids)
+            yield from page_ids
 
             page_token = resp.get("nextPageToken")
             if not page_token:
-                break
-
-        return video_ids
+                return
 
     except HttpError as e:
         _raise_friendly_http_error(e, "listing channel uploads")
 
 
-def get_video_details(youtube, video_ids: List[str]) -> List[Dict[str, Any]]:
+def list_upload_video_ids(
+    youtube,
+    uploads_playlist_id: str,
+    max_videos: int,
+    fields: Optional[str] = PLAYLIST_FIELDS_MASK,
+) -> List[str]:
+    return list(iter_upload_video_ids(
+        youtube, uploads_playlist_id, max_videos, fields=fields))
+
+
+def get_video_details(
+    youtube,
+    video_ids: Iterable[str],
+    fields: Optional[str] = VIDEOS_FIELDS_MASK,
+) -> List[Dict[str, Any]]:
+    # Requests are built here and executed concurrently, one batch of 50
+    # ids each. Results are consumed in batch order. video_ids may be a
+    # lazy iterator; batches are dispatched as soon as they fill up.
+    # Duplicate ids are requested once and produce a single row.
+    join_ids = ",".join
+    batch_requests = (
+        youtube.videos().list(
+            part="snippet,statistics",
+            id=join_ids(batch),
+            fields=fields,
+        )
+        for batch in chunked(unique(video_ids), 50)
+    )
+
+    def execute(request):
+        return request.execute(http=_thread_http(request.http))
+
     rows: List[Dict[str, Any]] = []
+    append = rows.append
     try:
-        for batch in chunked(video_ids, 50):
-            resp = youtube.videos().list(
-                part="snippet,statistics",
-                id=",".join(batch)
-            ).execute()
-
-            for it in resp.get("items", []):
-                vid = it["id"]
-                snippet = it.get("snippet", {})
-                stats = it.get("statistics", {})
-
-                rows.append({
-                    "video_url": f"https://www.youtube.com/watch?v={vid}",
-                    "title": snippet.get("title", ""),
-                    "thumbnail_url": pick_thumbnail(snippet),
-                    "view_count": stats.get("viewCount", ""),
-                    "posted_date": iso_to_date(snippet.get("publishedAt", "")),
-                    "video_id": vid,
-                })
+        with ThreadPoolExecutor(max_workers=VIDEO_DETAILS_WORKERS) as ex:
+            for resp in ex.map(execute, batch_requests):
+                for it in resp.get("items", []):
+                    vid = it["id"]
+                    snippet = it.get("snippet", _EMPTY_DICT)
+                    snippet_get = snippet.get
+
+                    append({
+                        "video_url": "https://www.youtube.com/watch?v=" + vid,
+                        "title": snippet_get("title", ""),
+                        "thumbnail_url": pick_thumbnail(snippet),
+                        "view_count": it.get("statistics", _EMPTY_DICT).get("viewCount", ""),
+                        "posted_date": iso_to_date(snippet_get("publishedAt", "")),
+                        "video_id": vid,
+                    })
         return rows
 
     except HttpError as e:
@@ -259,20 +451,29 @@ def get_transcript_official(
 
     prefer_langs = prefer_langs or ["en", "de"]
 
+    cache_key = f"{video_id}|{','.join(prefer_langs)}"
+    cached = _CAPTION_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        resp = youtube_oauth.captions().list(part="snippet", videoId=video_id).execute()
+        resp = youtube_oauth.captions().list(
+            part="snippet", videoId=video_id, fields=CAPTIONS_FIELDS_MASK).execute()
         items = resp.get("items", [])
         if not items:
             return ""
 
-        def score(item: Dict[str, Any]) -> int:
-            lang = item.get("snippet", {}).get("language", "")
-            return 0 if lang in prefer_langs else 1
-
-        items_sorted = sorted(items, key=score)
-        caption_id = items_sorted[0]["id"]
-        srt = download_caption_track(youtube_oauth, caption_id)
-        return srt.strip()
+        # First track in a preferred language, else the first track.
+        prefer = set(prefer_langs)
+        chosen = next(
+            (it for it in items if it.get("snippet", _EMPTY_DICT).get("language", "") in prefer),
+            items[0],
+        )
+        caption_id = chosen["id"]
+        transcript = download_caption_track(youtube_oauth, caption_id).strip()
+        if transcript:
+            _CAPTION_CACHE.set(cache_key, transcript)
+        return transcript
 
     except HttpError:
         return ""